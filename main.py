@@ -1,10 +1,12 @@
-import redis
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from redis import asyncio as aioredis
 
 from src.api.v1.resources import posts, users
 from src.core import config
 from src.db import (cache, redis_cache,)
+from src.services import PostService, UserService
 
 app = FastAPI(
     # Конфигурируем название проекта. Оно будет отображаться в документации
@@ -15,52 +17,67 @@ app = FastAPI(
     redoc_url="/api/redoc",
     # Адрес документации в формате OpenAPI
     openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse,
 )
 
 
 @app.get("/")
-def root():
+async def root():
     return {"service": config.PROJECT_NAME, "version": config.VERSION}
 
 
 @app.on_event("startup")
-def startup():
+async def startup():
     """Подключаемся к базам при старте сервера"""
     cache.cache = redis_cache.CacheRedis(
-        cache_instance=redis.Redis(
-            host=config.REDIS_HOST,
-            port=config.REDIS_PORT,
-            max_connections=10,
-            decode_responses=True,
-            db=0
+        cache_instance=aioredis.Redis(
+            connection_pool=aioredis.BlockingConnectionPool(
+                host=config.REDIS_HOST,
+                port=config.REDIS_PORT,
+                max_connections=config.REDIS_MAX_CONNECTIONS,
+                socket_keepalive=True,
+                db=0
+            )
         )
     )
-    cache.blocked_access_tokens = redis_cache.CacheRedis(
-        cache_instance=redis.Redis(
-            host=config.REDIS_HOST,
-            port=config.REDIS_PORT,
-            max_connections=10,
-            decode_responses=True,
-            db=1
+    cache.blocked_access_tokens = redis_cache.CacheBlockedTkns(
+        cache_instance=aioredis.Redis(
+            connection_pool=aioredis.BlockingConnectionPool(
+                host=config.REDIS_HOST,
+                port=config.REDIS_PORT,
+                max_connections=config.REDIS_MAX_CONNECTIONS,
+                socket_keepalive=True,
+                db=1
+            )
         )
     )
+    await cache.blocked_access_tokens.load()
     cache.active_refresh_tokens = redis_cache.CacheRefreshTkns(
-        cache_instance=redis.Redis(
-            host=config.REDIS_HOST,
-            port=config.REDIS_PORT,
-            max_connections=10,
-            decode_responses=True,
-            db=2
+        cache_instance=aioredis.Redis(
+            connection_pool=aioredis.BlockingConnectionPool(
+                host=config.REDIS_HOST,
+                port=config.REDIS_PORT,
+                max_connections=config.REDIS_MAX_CONNECTIONS,
+                socket_keepalive=True,
+                db=2
+            )
         )
     )
+    # Сервисы не зависят от запроса, поэтому создаем их один раз
+    app.state.post_service = PostService(cache=cache.cache, access_cash=cache.blocked_access_tokens)
+    app.state.user_service = UserService(
+        cache=cache.cache,
+        access_cash=cache.blocked_access_tokens,
+        refresh_cash=cache.active_refresh_tokens,
+    )
 
 
 @app.on_event("shutdown")
-def shutdown():
+async def shutdown():
     """Отключаемся от баз при выключении сервера"""
-    cache.cache.close()
-    cache.active_refresh_tokens.close()
-    cache.blocked_access_tokens.close()
+    await cache.cache.close()
+    await cache.active_refresh_tokens.close()
+    await cache.blocked_access_tokens.close()
 
 
 # Подключаем роутеры к серверу
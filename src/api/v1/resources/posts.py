@@ -1,27 +1,29 @@
 from http import HTTPStatus
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.api.v1.resources.users import reusable_oauth2
 from src.api.v1.schemas import PostCreate, PostListResponse, PostModel
+from src.db import get_session
 from src.services import PostService, get_post_service
 
 router = APIRouter()
 
 
 @router.get(path="/", response_model=PostListResponse, summary="Список постов", tags=["posts"],)
-def post_list(post_service: PostService = Depends(get_post_service),) -> PostListResponse:
-    posts: dict = post_service.get_post_list()
-    if not posts:
-        # Если посты не найдены, отдаём 404 статус
-        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Сообщения не найдены.")
-    return PostListResponse(**posts)
+async def post_list(post_service: PostService = Depends(get_post_service),
+                    session: AsyncSession = Depends(get_session),) -> Response:
+    posts: bytes = await post_service.get_post_list(session)
+    # Список уже сериализован в JSON, повторная валидация через PostListResponse не нужна
+    return Response(content=posts, media_type="application/json")
 
 
 @router.get(path="/{post_id}", response_model=PostModel, summary="Получить определенный пост", tags=["posts"],)
-def post_detail(post_id: int, post_service: PostService = Depends(get_post_service),) -> PostModel:
-    post: Optional[dict] = post_service.get_post_detail(item_id=post_id)
+async def post_detail(post_id: int, post_service: PostService = Depends(get_post_service),
+                      session: AsyncSession = Depends(get_session),) -> PostModel:
+    post: Optional[dict] = await post_service.get_post_detail(session, item_id=post_id)
     if not post:
         # Если пост не найден, отдаём 404 статус
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Сообщение не найдено.")
@@ -29,8 +31,9 @@ def post_detail(post_id: int, post_service: PostService = Depends(get_post_servi
 
 
 @router.post(path="/", response_model=PostModel, summary="Создать пост", tags=["posts"],)
-def post_create(post: PostCreate, post_service: PostService = Depends(get_post_service),
-                token: str = Depends(reusable_oauth2)) -> PostModel:
-    post_service.check_jwt(token)
-    post: dict = post_service.create_post(post=post)
+async def post_create(post: PostCreate, post_service: PostService = Depends(get_post_service),
+                      session: AsyncSession = Depends(get_session),
+                      token: str = Depends(reusable_oauth2)) -> PostModel:
+    await post_service.check_jwt(token)
+    post: dict = await post_service.create_post(session, post=post)
     return PostModel(**post)
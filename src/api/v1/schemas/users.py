@@ -2,11 +2,14 @@ import re
 import uuid as uuid_pkg
 
 from datetime import datetime
+from typing import Optional
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 
 __all__ = ("Token", "UserLogin", "UserModel", "UserCreate", "UserUpdate")
 
+_EMAIL_RE = re.compile(r"^[-\w\.]+@([-\w]+\.)+[-\w]{2,4}$")
+
 
 class Token(BaseModel):
     access_token: str
@@ -26,10 +29,10 @@ class UserCreate(UserBase):
     password: str = Field(min_length=4, max_length=30)
     email: str = Field(min_length=6, max_length=25)
 
-    @validator("email")
-    def check_email(cls, v):
-        pattern = r"^[-\w\.]+@([-\w]+\.)+[-\w]{2,4}$"
-        if not re.match(pattern, v):
+    @field_validator("email")
+    @classmethod
+    def check_email(cls, v: str) -> str:
+        if not _EMAIL_RE.match(v):
             raise ValueError('Неправильный адрес электронной почты.')
         return v
 
@@ -43,14 +46,14 @@ class UserModel(UserBase):
 
 
 class UserUpdate(BaseModel):
-    username: str = Field(default=None, min_length=4, max_length=20)
-    email: str = Field(default=None, min_length=6, max_length=25)
+    username: Optional[str] = Field(default=None, min_length=4, max_length=20)
+    email: Optional[str] = Field(default=None, min_length=6, max_length=25)
 
-    @validator("email")
-    def check_email(cls, v):
-        pattern = r"^[-\w\.]+@([-\w]+\.)+[-\w]{2,4}$"
+    @field_validator("email")
+    @classmethod
+    def check_email(cls, v: Optional[str]) -> Optional[str]:
         if v is None:
             return v
-        if not re.match(pattern, v):
+        if not _EMAIL_RE.match(v):
             raise ValueError('Неправильный адрес электронной почты.')
         return v
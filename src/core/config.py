@@ -15,8 +15,13 @@ PROJECT_NAME: str = os.getenv("PROJECT_NAME", "ylab_hw_3")
 # Настройки Redis
 REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT: int = int(os.getenv("REDIS_PORT", 6379))
+REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 200))
 CACHE_EXPIRE_IN_SECONDS: int = 60 * 5  # 5 минут
+POST_LIST_CACHE_EXPIRE_IN_SECONDS: int = 30  # 30 секунд
 REFRESH_TOKENS_EXPIRE_IN_SECONDS: int = 60 * 60 * 24 * 30  # 30 Дней
+# Фильтр Блума для заблокированных токенов: два поколения по ~2.3 Мб при 1 млн записей
+BLOCKED_TOKENS_BLOOM_CAPACITY: int = 1_000_000
+BLOCKED_TOKENS_BLOOM_ERROR_RATE: float = 1e-4
 
 # Настройки Postgres
 POSTGRES_HOST: str = os.getenv("POSTGRES_HOST", "localhost")
@@ -24,8 +29,15 @@ POSTGRES_PORT: int = int(os.getenv("POSTGRES_PORT", 5432))
 POSTGRES_DB: str = os.getenv("POSTGRES_DB", "ylab_hw")
 POSTGRES_USER: str = os.getenv("POSTGRES_USER", "ylab_hw")
 POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "ylab_hw")
-
-DATABASE_URL: str = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+POSTGRES_POOL_SIZE: int = int(os.getenv("POSTGRES_POOL_SIZE", 30))
+POSTGRES_MAX_OVERFLOW: int = int(os.getenv("POSTGRES_MAX_OVERFLOW", 60))
+POSTGRES_POOL_RECYCLE_IN_SECONDS: int = int(os.getenv("POSTGRES_POOL_RECYCLE_IN_SECONDS", 60 * 30))  # 30 минут
+# Логирование каждого SQL-запроса заметно замедляет работу, включается только для отладки
+POSTGRES_ECHO: bool = os.getenv("POSTGRES_ECHO", "false").lower() == "true"
+
+DATABASE_URL: str = (
+    f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+)
 
 # Корень проекта
 BASE_DIR = Path(__file__).resolve().parent.parent
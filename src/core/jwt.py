@@ -1,32 +1,136 @@
-import jwt
+import base64
+import hmac
+import time
 import uuid
 
-from datetime import datetime, timedelta
+from datetime import timedelta
+from typing import Optional, Tuple
 
-from src.core.config import (JWT_ALGORITHM, JWT_SECRET_KEY, ACCESS_TOKEN_EXPIRE_MINUTES)
+import orjson
+
+from src.core.config import (JWT_ALGORITHM, JWT_SECRET_KEY, ACCESS_TOKEN_EXPIRE_MINUTES,
+                             REFRESH_TOKENS_EXPIRE_IN_SECONDS)
+
+__all__ = ("InvalidTokenError", "encode_jwt", "decode_jwt", "create_access_token", "create_refresh_token")
+
+# Поддерживаемые алгоритмы подписи и соответствующие им хеш-функции OpenSSL
+_DIGESTS = {"HS256": "sha256", "HS384": "sha384", "HS512": "sha512"}
+# Ключ HMAC (ipad/opad) вычисляется один раз, для подписи копируется готовое состояние
+_HMAC_PROTOTYPES = {
+    algorithm: hmac.new(JWT_SECRET_KEY.encode(), digestmod=digest) for algorithm, digest in _DIGESTS.items()
+}
+
+
+class InvalidTokenError(Exception):
+    """Токен не прошел проверку"""
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+# Допустимые алгоритмы и закодированные заголовки токенов вычисляются один раз при импорте
+_ALGS = (JWT_ALGORITHM,)
+_HEADER_SEGMENTS = {
+    algorithm: _b64encode(orjson.dumps({"alg": algorithm, "typ": "JWT"})) for algorithm in _HMAC_PROTOTYPES
+}
+_HEADER_ALGORITHMS = {segment: algorithm for algorithm, segment in _HEADER_SEGMENTS.items()}
+
+
+def _header_algorithm(header_segment: bytes) -> Optional[str]:
+    """Алгоритм из заголовка токена; стандартный заголовок распознается без разбора JSON"""
+    if algorithm := _HEADER_ALGORITHMS.get(header_segment):
+        return algorithm
+    header = orjson.loads(_b64decode(header_segment))
+    if not isinstance(header, dict):
+        raise InvalidTokenError("Invalid token format")
+    return header.get("alg")
+
+
+def _sign(signing_input: bytes, algorithm: str) -> bytes:
+    mac = _HMAC_PROTOTYPES[algorithm].copy()
+    mac.update(signing_input)
+    return mac.digest()
+
+
+def encode_jwt(payload: dict, algorithm: str = JWT_ALGORITHM) -> str:
+    """Кодирование и подпись токена"""
+    signing_input = _HEADER_SEGMENTS[algorithm] + b"." + _b64encode(orjson.dumps(payload))
+    return (signing_input + b"." + _b64encode(_sign(signing_input, algorithm))).decode()
+
+
+def _split_token(token: str) -> Tuple[bytes, Optional[str], dict, bytes]:
+    """Разбор токена на подписываемую часть, алгоритм, полезную нагрузку и подпись"""
+    try:
+        signing_input, crypto_segment = token.encode().rsplit(b".", 1)
+        header_segment, payload_segment = signing_input.split(b".", 1)
+        algorithm = _header_algorithm(header_segment)
+        payload = orjson.loads(_b64decode(payload_segment))
+        signature = _b64decode(crypto_segment)
+    except ValueError:
+        raise InvalidTokenError("Invalid token format")
+    if not isinstance(payload, dict):
+        raise InvalidTokenError("Invalid token format")
+    return signing_input, algorithm, payload, signature
+
+
+def _check_alg_and_signature(signing_input: bytes, algorithm: Optional[str], signature: bytes,
+                             algorithms: tuple) -> None:
+    if algorithm not in algorithms or algorithm not in _HMAC_PROTOTYPES:
+        raise InvalidTokenError("The specified alg value is not allowed")
+    if not hmac.compare_digest(signature, _sign(signing_input, algorithm)):
+        raise InvalidTokenError("Signature verification failed")
+
+
+def _int_claim(payload: dict, name: str) -> Optional[int]:
+    if name not in payload:
+        return None
+    if not isinstance(payload[name], int):
+        raise InvalidTokenError(f"The {name} claim must be an integer")
+    return payload[name]
+
+
+def _check_time_claims(payload: dict) -> None:
+    now = time.time()
+    expire = _int_claim(payload, "exp")
+    if expire is not None and expire <= now:
+        raise InvalidTokenError("Signature has expired")
+    not_before = _int_claim(payload, "nbf")
+    if not_before is not None and not_before > now:
+        raise InvalidTokenError("The token is not yet valid")
+
+
+def decode_jwt(token: str, algorithms: tuple = _ALGS) -> dict:
+    """Проверка подписи и срока действия токена, получение полезной нагрузки"""
+    signing_input, algorithm, payload, signature = _split_token(token)
+    _check_alg_and_signature(signing_input, algorithm, signature, algorithms)
+    _check_time_claims(payload)
+    return payload
 
 
 def create_access_token(*, data: dict, refresh_jti: str, expires_delta: timedelta = None):
-    jti = str(uuid.uuid4())
+    jti = uuid.uuid4().hex
     to_encode = data.copy()
-    time_now = datetime.utcnow()
-    to_encode.update({"iat": int(time_now.timestamp()), "jti": jti, "nbf": int(time_now.timestamp()),
-                      "refresh_jti": refresh_jti})
+    time_now = int(time.time())
     if expires_delta:
-        expire = time_now + expires_delta
+        expire = time_now + int(expires_delta.total_seconds())
     else:
-        expire = time_now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": int(expire.timestamp()), "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, JWT_ALGORITHM)
+        expire = time_now + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    to_encode.update({"iat": time_now, "jti": jti, "nbf": time_now, "refresh_jti": refresh_jti,
+                      "exp": expire, "type": "access"})
+    encoded_jwt = encode_jwt(to_encode)
     return encoded_jwt
 
 
 def create_refresh_token(*, user_uuid: str):
-    time_now = datetime.utcnow()
-    time_delta = timedelta(days=30)
-    jti = str(uuid.uuid4())
-    expire = time_now + time_delta
-    to_encode = {"iat": int(time_now.timestamp()), "jti": jti, "type": "refresh", "uuid": user_uuid,
-                 "nbf": int(time_now.timestamp()), "exp": int(expire.timestamp())}
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, JWT_ALGORITHM)
+    time_now = int(time.time())
+    jti = uuid.uuid4().hex
+    expire = time_now + REFRESH_TOKENS_EXPIRE_IN_SECONDS
+    to_encode = {"iat": time_now, "jti": jti, "type": "refresh", "uuid": user_uuid,
+                 "nbf": time_now, "exp": expire}
+    encoded_jwt = encode_jwt(to_encode)
     return encoded_jwt
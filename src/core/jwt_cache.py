@@ -0,0 +1,45 @@
+import hashlib
+import threading
+import time
+
+from cachetools import TLRUCache
+
+from src.core.jwt import decode_jwt
+
+__all__ = ("verify_cached", "invalidate_token")
+
+# Максимальное время жизни проверенного токена в кэше, секунд
+JWT_CACHE_TTL: int = 30
+JWT_CACHE_MAXSIZE: int = 10000
+
+
+def _ttu(_key: str, payload: dict, now: float) -> float:
+    """Время истечения записи: не позже exp токена и не дольше JWT_CACHE_TTL"""
+    return min(payload.get("exp", now), now + JWT_CACHE_TTL)
+
+
+_cache = TLRUCache(maxsize=JWT_CACHE_MAXSIZE, ttu=_ttu, timer=time.time)
+_lock = threading.Lock()
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def verify_cached(token: str) -> dict:
+    """Проверка подписи токена с кэшированием полезной нагрузки"""
+    key = _token_key(token)
+    with _lock:
+        payload = _cache.get(key)
+    if payload is not None:
+        return payload
+    payload = decode_jwt(token)
+    with _lock:
+        _cache[key] = payload
+    return payload
+
+
+def invalidate_token(token: str) -> None:
+    """Удаление проверенного токена из кэша"""
+    with _lock:
+        _cache.pop(_token_key(token), None)
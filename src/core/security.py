@@ -1,10 +1,14 @@
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Новые пароли хешируются argon2id, хеши bcrypt проверяются и помечаются устаревшими
+pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
 
 
-def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Проверка пароля; вторым значением возвращается новый хеш, если старый устарел"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
 
 
 def get_password_hash(password: str):
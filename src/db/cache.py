@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Optional, Union
 
-__all__ = ("AbstractCache", "get_cache", "get_access_cash", "get_refresh_cash",)
+__all__ = ("AbstractCache",)
 
 from src.core import config
 
@@ -11,31 +11,22 @@ class AbstractCache(ABC):
         self.cache = cache_instance
 
     @abstractmethod
-    def get(self, key: str):
+    async def get(self, key: str):
         pass
 
     @abstractmethod
-    def set(self, key: str, value: Union[bytes, str], expire: int = config.CACHE_EXPIRE_IN_SECONDS,):
+    async def set(self, key: str, value: Union[bytes, str], expire: int = config.CACHE_EXPIRE_IN_SECONDS,):
         pass
 
     @abstractmethod
-    def close(self):
+    async def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    async def close(self):
         pass
 
 
 cache: Optional[AbstractCache] = None
 blocked_access_tokens: Optional[AbstractCache] = None
 active_refresh_tokens: Optional[AbstractCache] = None
-
-
-def get_access_cash() -> AbstractCache:
-    return blocked_access_tokens
-
-
-def get_refresh_cash() -> AbstractCache:
-    return active_refresh_tokens
-
-
-# Функция понадобится при внедрении зависимостей
-def get_cache() -> AbstractCache:
-    return cache
@@ -1,13 +1,21 @@
-from sqlmodel import Session, create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.core import config
 
 __all__ = ("get_session",)
 
 
-engine = create_engine(config.DATABASE_URL, echo=True)
+engine = create_async_engine(
+    config.DATABASE_URL,
+    echo=config.POSTGRES_ECHO,
+    pool_size=config.POSTGRES_POOL_SIZE,
+    max_overflow=config.POSTGRES_MAX_OVERFLOW,
+    pool_recycle=config.POSTGRES_POOL_RECYCLE_IN_SECONDS,
+    pool_pre_ping=False,
+)
 
 
-def get_session():
-    with Session(engine) as session:
+async def get_session():
+    async with AsyncSession(engine) as session:
         yield session
@@ -1,35 +1,164 @@
+import asyncio
+import hashlib
+import logging
+import math
 from typing import NoReturn, Optional, Union
 
 from src.core import config
 from src.db import AbstractCache
 
-__all__ = ("CacheRedis", "CacheRefreshTkns")
+__all__ = ("BlockedTokenBloom", "CacheBlockedTkns", "CacheRedis", "CacheRefreshTkns")
+
+BLOCKED_TOKENS_CHANNEL = "blocked_access_tokens"
+# Пауза перед повторной подпиской после разрыва соединения с Redis
+BLOCKED_TOKENS_RESYNC_DELAY_IN_SECONDS: int = 1
+
+logger = logging.getLogger(__name__)
 
 
 class CacheRedis(AbstractCache):
-    def get(self, key: str) -> Optional[dict]:
-        return self.cache.get(name=key)
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.cache.get(name=key)
+
+    async def set(self, key: str, value: Union[bytes, str], expire: int = config.CACHE_EXPIRE_IN_SECONDS,):
+        await self.cache.set(name=key, value=value, ex=expire)
 
-    def set(self, key: str, value: Union[bytes, str], expire: int = config.CACHE_EXPIRE_IN_SECONDS,):
-        self.cache.set(name=key, value=value, ex=expire)
+    async def delete(self, key: str) -> NoReturn:
+        await self.cache.delete(key)
 
-    def close(self) -> NoReturn:
-        self.cache.close()
+    async def close(self) -> NoReturn:
+        await self.cache.close(close_connection_pool=True)
 
 
 class CacheRefreshTkns(CacheRedis):
 
-    def get(self, key: str) -> Optional[list]:
-        list_len = self.cache.llen(key)
-        return self.cache.lrange(key, 0, list_len)
+    async def get(self, key: str) -> Optional[list]:
+        return await self.cache.lrange(key, 0, -1)
+
+    async def close(self) -> NoReturn:
+        await self.cache.close(close_connection_pool=True)
+
+    async def add(self, key, *values):
+        await self.cache.lpush(key, *values)
+
+    async def remove(self, key, value) -> int:
+        # jti уникален, поэтому достаточно удалить первое вхождение и не просматривать список до конца
+        return await self.cache.lrem(key, 1, value)
+
+    async def clean(self, key):
+        await self.cache.delete(key)
+
+
+class BlockedTokenBloom:
+    """Фильтр Блума: ложноотрицательных ответов нет, ложноположительные - с вероятностью error_rate.
+
+    Удалить запись из фильтра нельзя, поэтому он состоит из двух поколений: rotate() делает текущее
+    поколение предыдущим и начинает новое. Добавленная запись остается в фильтре от одного до двух
+    периодов ротации, и фильтр не переполняется истекшими токенами.
+    """
+
+    def __init__(self, capacity: int = config.BLOCKED_TOKENS_BLOOM_CAPACITY,
+                 error_rate: float = config.BLOCKED_TOKENS_BLOOM_ERROR_RATE):
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.previous_bits = bytearray(len(self.bits))
+
+    def _positions(self, key: Union[bytes, str]):
+        if isinstance(key, str):
+            key = key.encode()
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    @staticmethod
+    def _is_set(bits: bytearray, positions: list) -> bool:
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+
+    def add(self, key: Union[bytes, str]) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def rotate(self) -> None:
+        self.previous_bits = self.bits
+        self.bits = bytearray(len(self.previous_bits))
+
+    def __contains__(self, key: Union[bytes, str]) -> bool:
+        positions = self._positions(key)
+        return self._is_set(self.bits, positions) or self._is_set(self.previous_bits, positions)
+
+
+class CacheBlockedTkns(CacheRedis):
+    """Заблокированные токены доступа с локальным фильтром Блума перед Redis.
+
+    Большинство проверяемых токенов не заблокированы, и фильтр отвечает на это без обращения к Redis.
+    Другие процессы приложения узнают о новых блокировках через pub/sub канал BLOCKED_TOKENS_CHANNEL.
+    Фильтр ротируется каждые rotate_interval секунд, поэтому срок хранения блокировки в Redis
+    не должен превышать rotate_interval.
+    """
+
+    def __init__(self, cache_instance, bloom: Optional[BlockedTokenBloom] = None,
+                 rotate_interval: int = config.CACHE_EXPIRE_IN_SECONDS):
+        super().__init__(cache_instance=cache_instance)
+        self.bloom = bloom or BlockedTokenBloom()
+        self.rotate_interval = rotate_interval
+        self._listener: Optional[asyncio.Task] = None
+        self._rotator: Optional[asyncio.Task] = None
+        # Пока фильтр не синхронизирован с Redis, проверяем каждый токен в Redis
+        self._synced = False
+
+    async def load(self) -> None:
+        """Запуск синхронизации фильтра с Redis и его ротации"""
+        self._listener = asyncio.create_task(self._listen())
+        self._rotator = asyncio.create_task(self._rotate())
+
+    async def _listen(self) -> None:
+        """Поддержание подписки: после разрыва соединения подписываемся и заполняем фильтр заново"""
+        while True:
+            try:
+                await self._sync()
+                logger.warning("Подписка на канал %s завершилась", BLOCKED_TOKENS_CHANNEL)
+            except Exception:
+                logger.exception("Подписка на канал %s прервана", BLOCKED_TOKENS_CHANNEL)
+            await asyncio.sleep(BLOCKED_TOKENS_RESYNC_DELAY_IN_SECONDS)
+
+    async def _sync(self) -> None:
+        """Подписка на новые блокировки, заполнение фильтра уже заблокированными токенами и прием сообщений"""
+        pubsub = self.cache.pubsub(ignore_subscribe_messages=True)
+        try:
+            # Подписываемся до SCAN, чтобы не пропустить блокировки, сделанные во время обхода
+            await pubsub.subscribe(BLOCKED_TOKENS_CHANNEL)
+            async for key in self.cache.scan_iter(count=1000):
+                self.bloom.add(key)
+            self._synced = True
+            async for message in pubsub.listen():
+                self.bloom.add(message["data"])
+        finally:
+            # Без подписки фильтр может пропустить чужие блокировки
+            self._synced = False
+            await pubsub.close()
+
+    async def _rotate(self) -> None:
+        while True:
+            await asyncio.sleep(self.rotate_interval)
+            self.bloom.rotate()
 
-    def close(self) -> NoReturn:
-        self.cache.close()
+    async def get(self, key: str) -> Optional[bytes]:
+        if self._synced and key not in self.bloom:
+            return None
+        return await super().get(key)
 
-    def add(self, key, *values):
-        self.cache.lpush(key, *values)
+    async def set(self, key: str, value: Union[bytes, str], expire: int = config.CACHE_EXPIRE_IN_SECONDS,):
+        self.bloom.add(key)
+        async with self.cache.pipeline(transaction=False) as pipe:
+            pipe.set(name=key, value=value, ex=expire)
+            pipe.publish(BLOCKED_TOKENS_CHANNEL, key)
+            await pipe.execute()
 
-    def clean(self, key):
-        list_len = self.cache.llen(key)
-        for i in range(list_len):
-            self.cache.lpop(key)
+    async def close(self) -> NoReturn:
+        tasks = [task for task in (self._listener, self._rotator) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.cache.close(close_connection_pool=True)
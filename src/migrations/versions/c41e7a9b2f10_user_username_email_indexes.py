@@ -0,0 +1,30 @@
+"""user username and email indexes
+
+Revision ID: c41e7a9b2f10
+Revises: 8f4a32e7dd5d
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e7a9b2f10'
+down_revision = '8f4a32e7dd5d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Уникальные индексы заменяют ограничения уникальности, чтобы не держать два B-tree на одну колонку
+    op.drop_constraint('user_username_key', 'user', type_='unique')
+    op.drop_constraint('user_email_key', 'user', type_='unique')
+    op.create_index(op.f('ix_user_username'), 'user', ['username'], unique=True)
+    op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_user_email'), table_name='user')
+    op.drop_index(op.f('ix_user_username'), table_name='user')
+    op.create_unique_constraint('user_email_key', 'user', ['email'])
+    op.create_unique_constraint('user_username_key', 'user', ['username'])
@@ -11,4 +11,4 @@ class Post(SQLModel, table=True):
     title: str = Field(nullable=False)
     description: str = Field(nullable=False)
     views: int = Field(default=0)
-    created_at: datetime = Field(default=datetime.utcnow(), nullable=False)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
@@ -1,9 +1,6 @@
-from sqlmodel import Session
-
 from src.db import AbstractCache
 
 
 class ServiceMixin:
-    def __init__(self, cache: AbstractCache, session: Session):
+    def __init__(self, cache: AbstractCache):
         self.cache: AbstractCache = cache
-        self.session: Session = session
@@ -1,67 +1,77 @@
-import json
-from functools import lru_cache
 from typing import Optional
 
-import jwt
-from fastapi import Depends, HTTPException
-from jwt import PyJWTError
-from sqlmodel import Session
+import orjson
+from fastapi import HTTPException, Request
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.status import HTTP_403_FORBIDDEN
 
-from src.api.v1.schemas import PostCreate, PostModel
-from src.core.config import JWT_SECRET_KEY, JWT_ALGORITHM
-from src.db import AbstractCache, get_cache, get_session, get_access_cash
+from src.api.v1.schemas import PostCreate
+from src.core.config import POST_LIST_CACHE_EXPIRE_IN_SECONDS
+from src.core.jwt import InvalidTokenError
+from src.core.jwt_cache import verify_cached
+from src.db import AbstractCache
 from src.models import Post
 from src.services import ServiceMixin
 
 __all__ = ("PostService", "get_post_service")
 
+POST_LIST_CACHE_KEY = "posts:list:v1"
+
 
 class PostService(ServiceMixin):
-    def __init__(self, cache: AbstractCache, access_cash: AbstractCache, session: Session):
-        super().__init__(cache=cache, session=session)
+    def __init__(self, cache: AbstractCache, access_cash: AbstractCache):
+        super().__init__(cache=cache)
         self.blocked_access_tokens = access_cash
 
-    def get_post_list(self) -> dict:
-        """Получить список постов."""
-        posts = self.session.query(Post).order_by(Post.created_at).all()
-        return {"posts": [PostModel(**post.dict()) for post in posts]}
+    async def get_post_list(self, session: AsyncSession) -> bytes:
+        """Получить сериализованный в JSON список постов."""
+        if cached_posts := await self.cache.get(key=POST_LIST_CACHE_KEY):
+            return cached_posts
+        statement = select(Post.id, Post.title, Post.description, Post.created_at).order_by(Post.created_at)
+        rows = (await session.exec(statement)).all()
+        # Строки из БД уже типизированы: собираем словари напрямую, без Row-маппинга и валидации PostModel
+        posts = orjson.dumps({"posts": [
+            {"id": id_, "title": title, "description": description, "created_at": created_at}
+            for id_, title, description, created_at in rows
+        ]})
+        await self.cache.set(key=POST_LIST_CACHE_KEY, value=posts, expire=POST_LIST_CACHE_EXPIRE_IN_SECONDS)
+        return posts
 
-    def get_post_detail(self, item_id: int) -> Optional[dict]:
+    async def get_post_detail(self, session: AsyncSession, item_id: int) -> Optional[dict]:
         """Получить детальную информацию поста."""
-        if cached_post := self.cache.get(key=f"{item_id}"):
-            return json.loads(cached_post)
-        post = self.session.query(Post).filter(Post.id == item_id).first()
+        if cached_post := await self.cache.get(key=f"post:{item_id}"):
+            return orjson.loads(cached_post)
+        post = (await session.exec(select(Post).where(Post.id == item_id))).first()
         if post:
-            self.cache.set(key=f"{post.id}", value=post.json())
-        return post.dict() if post else None
+            await self.cache.set(key=f"post:{post.id}", value=orjson.dumps(post.model_dump()))
+        return post.model_dump() if post else None
 
-    def create_post(self, post: PostCreate) -> dict:
+    async def create_post(self, session: AsyncSession, post: PostCreate) -> dict:
         """Создать пост."""
         new_post = Post(title=post.title, description=post.description)
-        self.session.add(new_post)
-        self.session.commit()
-        self.session.refresh(new_post)
-        return new_post.dict()
+        session.add(new_post)
+        await session.commit()
+        await session.refresh(new_post)
+        await self.cache.delete(key=POST_LIST_CACHE_KEY)
+        return new_post.model_dump()
 
-    def check_jwt(self, token: str) -> None:
+    async def check_jwt(self, token: str) -> None:
         try:
-            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+            payload = verify_cached(token)
             jti = payload["jti"]
-        except PyJWTError:
+        except InvalidTokenError:
             raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Не удалось проверить учетные данные.")
-        if self.check_block_token(jti):
+        if await self.check_block_token(jti):
             raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Токен был заблокирован.")
 
-    def check_block_token(self, jti: str) -> bool:
+    async def check_block_token(self, jti: str) -> bool:
         """Проверка токена среди заблокированных"""
-        if self.blocked_access_tokens.get(jti):
+        if await self.blocked_access_tokens.get(jti):
             return True
         return False
 
 
-# get_post_service — это провайдер PostService. Синглтон
-@lru_cache()
-def get_post_service(cache: AbstractCache = Depends(get_cache), access_cash: AbstractCache = Depends(get_access_cash),
-                     session: Session = Depends(get_session),) -> PostService:
-    return PostService(cache=cache, session=session, access_cash=access_cash)
+# get_post_service — это провайдер PostService. Синглтон, создается при старте сервера
+def get_post_service(request: Request) -> PostService:
+    return request.app.state.post_service
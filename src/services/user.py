@@ -1,17 +1,18 @@
-import jwt
-from functools import lru_cache
+import asyncio
 from typing import Optional
 
-from fastapi import Depends, HTTPException
-from jwt import PyJWTError
-from sqlmodel import Session, select
+from fastapi import HTTPException, Request
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from starlette.status import HTTP_403_FORBIDDEN, HTTP_401_UNAUTHORIZED
 
 from src.api.v1.schemas import UserCreate, UserModel
 from src.api.v1.schemas.users import UserUpdate
-from src.core.config import JWT_SECRET_KEY, JWT_ALGORITHM
-from src.core.security import verify_password, get_password_hash
-from src.db import (AbstractCache, CacheRefreshTkns, get_cache, get_session, get_access_cash, get_refresh_cash)
+from src.core.jwt import InvalidTokenError
+from src.core.jwt_cache import invalidate_token, verify_cached
+from src.core.security import get_password_hash, verify_and_update_password
+from src.db import AbstractCache, CacheRefreshTkns
 from src.models import User
 from src.services import ServiceMixin
 
@@ -20,114 +21,124 @@ __all__ = ("UserService", "get_user_service")
 
 class UserService(ServiceMixin):
 
-    def __init__(self, cache: AbstractCache, access_cash: AbstractCache, refresh_cash: CacheRefreshTkns,
-                 session: Session):
-        super().__init__(cache=cache, session=session)
+    def __init__(self, cache: AbstractCache, access_cash: AbstractCache, refresh_cash: CacheRefreshTkns):
+        super().__init__(cache=cache)
         self.blocked_access_tokens = access_cash
         self.active_refresh_tokens = refresh_cash
 
-    def get_by_username(self, username: str) -> Optional[User]:
+    async def get_by_username(self, session: AsyncSession, username: str) -> Optional[User]:
         """Получение пользователя по имени пользователя из базы данных"""
-        return self.session.query(User).filter(User.username == username).first()
+        statement = select(User).where(User.username == username).limit(1)
+        return (await session.exec(statement)).one_or_none()
 
-    def get_by_uuid(self, uuid: str) -> Optional[User]:
+    async def get_by_uuid(self, session: AsyncSession, uuid: str) -> Optional[User]:
         """Получение пользователя по uuid из базы данных"""
-        return self.session.query(User).filter(User.uuid == uuid).first()
+        statement = select(User).where(User.uuid == uuid).limit(1)
+        return (await session.exec(statement)).one_or_none()
 
-    def create_user(self, user: UserCreate) -> dict:
+    async def create_user(self, session: AsyncSession, user: UserCreate) -> dict:
         """Создание пользователя"""
-        password_hash = get_password_hash(user.password)
+        password_hash = await run_in_threadpool(get_password_hash, user.password)
         new_user = User(username=user.username, hashed_password=password_hash, email=user.email)
-        self.session.add(new_user)
-        self.session.commit()
-        self.session.refresh(new_user)
-        return new_user.dict()
+        session.add(new_user)
+        await session.commit()
+        await session.refresh(new_user)
+        return new_user.model_dump()
 
-    def authenticate(self, username: str, password: str) -> Optional[User]:
+    async def authenticate(self, session: AsyncSession, username: str, password: str) -> Optional[User]:
         """Выполнение аутентификации"""
-        user = self.get_by_username(username)
+        user = await self.get_by_username(session, username)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        # Хеширование намеренно медленное, выполняем его вне цикла событий
+        verified, new_hash = await run_in_threadpool(verify_and_update_password, password, user.hashed_password)
+        if not verified:
             return None
+        if new_hash:
+            user.hashed_password = new_hash
+            session.add(user)
+            await session.commit()
+            await session.refresh(user)
         return user
 
-    def get_current_user(self, token: str):
-        """Получение текущего пользователя из базы данных"""
-        jti = self.get_jti(token)
-        if self.check_block_token(jti):
+    async def get_current_user(self, token: str) -> dict:
+        """Получение текущего пользователя из проверенного токена доступа"""
+        payload = self.get_payload(token)
+        if await self.check_block_token(payload["jti"]):
             raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Токен был заблокирован.")
-        try:
-            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-            user_data = UserModel(**payload)
-        except PyJWTError:
-            raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Не удалось проверить учетные данные.")
-        user = self.session.query(User).filter(User.username == user_data.username).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="Пользователь не найден.")
-        return user.dict()
+        # Токен доступа короткоживущий и подписан сервером, поэтому данные пользователя берем из него без запроса к БД
+        return UserModel(**payload).model_dump()
 
-    def update_user(self, user: dict, new_data: UserUpdate) -> dict:
+    async def update_user(self, session: AsyncSession, user: dict, new_data: UserUpdate) -> dict:
         """Обновление пользователя в базе"""
-        statement = select(User).where(User.username == user["username"])
-        results = self.session.exec(statement)
-        selected_user = results.one()
+        statement = select(User).where(User.uuid == user["uuid"]).with_for_update()
+        results = await session.exec(statement)
+        selected_user = results.one_or_none()
+        if not selected_user:
+            raise HTTPException(status_code=404, detail="Пользователь не найден.")
         if new_data.username is not None:
             selected_user.username = new_data.username
         if new_data.email is not None:
             selected_user.email = new_data.email
-        self.session.add(selected_user)
-        self.session.commit()
-        self.session.refresh(selected_user)
-        return selected_user.dict()
+        session.add(selected_user)
+        await session.commit()
+        await session.refresh(selected_user)
+        return selected_user.model_dump()
 
-    def check_block_token(self, jti: str) -> bool:
+    async def check_block_token(self, jti: str) -> bool:
         """Проверка токена среди заблокированных"""
-        if self.blocked_access_tokens.get(jti):
+        if await self.blocked_access_tokens.get(jti):
             return True
         return False
 
-    def block_access_token(self, jti: str) -> None:
+    async def block_access_token(self, token: str) -> None:
         """Блокировка токена"""
-        self.blocked_access_tokens.set(jti, "blocked")
+        await self.blocked_access_tokens.set(self.get_jti(token), "blocked")
+        invalidate_token(token)
 
-    def add_refresh_token(self, token: str):
+    async def add_refresh_token(self, token: str):
         """Добавление токена обновления в активный список"""
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        payload = verify_cached(token)
         jti = payload["jti"]
         uuid = payload["uuid"]
-        self.active_refresh_tokens.add(uuid, jti)
+        await self.active_refresh_tokens.add(uuid, jti)
 
-    def remove_refresh_token(self, uuid: str, jti: str) -> None:
-        """Удаление токена обновления в активный список"""
-        current_tokens = self.active_refresh_tokens.get(uuid)
-        current_tokens.pop(current_tokens.index(jti))
-        self.active_refresh_tokens.clean(uuid)
-        if current_tokens:
-            self.active_refresh_tokens.add(uuid, *current_tokens)
+    async def remove_refresh_token(self, uuid: str, jti: str) -> int:
+        """Удаление токена обновления из активного списка, возвращается число удаленных записей"""
+        return await self.active_refresh_tokens.remove(uuid, jti)
 
-    def remove_all_refresh_tokens(self, uuid: str) -> None:
+    async def block_and_remove_refresh(self, token: str) -> None:
+        """Блокировка токена доступа и удаление связанного с ним токена обновления"""
+        payload = self.get_payload(token)
+        # Токены хранятся в разных базах Redis, и конвейер их не объединит, поэтому запросы идут параллельно
+        await asyncio.gather(self.block_access_token(token),
+                             self.remove_refresh_token(payload["uuid"], payload["refresh_jti"]))
+
+    async def block_and_remove_all_refresh(self, token: str) -> None:
+        """Блокировка токена доступа и удаление всех токенов обновления пользователя"""
+        payload = self.get_payload(token)
+        await asyncio.gather(self.block_access_token(token), self.remove_all_refresh_tokens(payload["uuid"]))
+
+    async def remove_all_refresh_tokens(self, uuid: str) -> None:
         """Очищение списка активных токенов"""
-        self.active_refresh_tokens.clean(uuid)
+        await self.active_refresh_tokens.clean(uuid)
 
-    def check_refresh_token(self, uuid: str, jti: str) -> bool:
-        """Проверка токена обновления в активном списке"""
-        current_tokens = self.active_refresh_tokens.get(uuid)
-        return True if jti in current_tokens else False
+    @staticmethod
+    def get_payload(token: str) -> dict:
+        """Получение полезной нагрузки из токена с проверкой подписи"""
+        try:
+            return verify_cached(token)
+        except InvalidTokenError:
+            raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Не удалось проверить учетные данные.")
 
     @staticmethod
     def get_jti(token: str) -> str:
         """Получение jti из токена"""
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        payload = verify_cached(token)
         jti = payload["jti"]
         return jti
 
 
-@lru_cache()
-def get_user_service(
-        cache: AbstractCache = Depends(get_cache),
-        access_cash: AbstractCache = Depends(get_access_cash),
-        refresh_cash: CacheRefreshTkns = Depends(get_refresh_cash),
-        session: Session = Depends(get_session),
-) -> UserService:
-    return UserService(cache=cache, access_cash=access_cash, refresh_cash=refresh_cash, session=session)
+# get_user_service — это провайдер UserService. Синглтон, создается при старте сервера
+def get_user_service(request: Request) -> UserService:
+    return request.app.state.user_service
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Dict, List, Union
+
+
+def _to_bytes(value: Union[bytes, str]) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class FakePubSub:
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.channels: List[bytes] = []
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        self.channels.extend(_to_bytes(channel) for channel in channels)
+
+    async def listen(self):
+        while True:
+            message = await self.messages.get()
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands.clear()
+
+    def set(self, *args, **kwargs):
+        self.commands.append(self.redis.set(*args, **kwargs))
+
+    def publish(self, *args, **kwargs):
+        self.commands.append(self.redis.publish(*args, **kwargs))
+
+    async def execute(self):
+        return [await command for command in self.commands]
+
+
+class FakeRedis:
+    """Минимальная замена redis.asyncio.Redis: только команды, которые использует приложение"""
+
+    def __init__(self):
+        self.values: Dict[bytes, bytes] = {}
+        self.lists: Dict[bytes, List[bytes]] = {}
+        self.pubsubs: List[FakePubSub] = []
+        self.get_calls = 0
+        self.scan_calls = 0
+
+    async def get(self, name):
+        self.get_calls += 1
+        return self.values.get(_to_bytes(name))
+
+    async def set(self, name, value, ex=None):
+        self.values[_to_bytes(name)] = _to_bytes(value)
+
+    async def delete(self, *names):
+        for name in names:
+            self.values.pop(_to_bytes(name), None)
+            self.lists.pop(_to_bytes(name), None)
+
+    async def lpush(self, name, *values):
+        items = self.lists.setdefault(_to_bytes(name), [])
+        for value in values:
+            items.insert(0, _to_bytes(value))
+        return len(items)
+
+    async def lrem(self, name, count, value):
+        items = self.lists.get(_to_bytes(name), [])
+        value = _to_bytes(value)
+        if value not in items:
+            return 0
+        items.remove(value)
+        return 1
+
+    async def scan_iter(self, count=None):
+        self.scan_calls += 1
+        for key in list(self.values):
+            yield key
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        pubsub = FakePubSub(self)
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+    async def publish(self, channel, message):
+        receivers = [pubsub for pubsub in self.pubsubs
+                     if not pubsub.closed and _to_bytes(channel) in pubsub.channels]
+        for pubsub in receivers:
+            pubsub.messages.put_nowait({"type": "message", "channel": _to_bytes(channel), "data": _to_bytes(message)})
+        return len(receivers)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def close(self, close_connection_pool=None):
+        pass
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+
+from src.db import redis_cache
+from src.db.redis_cache import BlockedTokenBloom, CacheBlockedTkns
+from tests.fakes import FakeRedis
+
+
+async def _wait_for(condition) -> None:
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condition was not met")
+
+
+def test_bloom_has_no_false_negatives():
+    bloom = BlockedTokenBloom(capacity=1000, error_rate=1e-3)
+    keys = [f"jti-{i}" for i in range(1000)]
+    for i, key in enumerate(keys):
+        bloom.add(key if i % 2 else key.encode())
+    assert all(key in bloom and key.encode() in bloom for key in keys)
+
+
+def test_bloom_rotation_keeps_entry_for_one_interval():
+    bloom = BlockedTokenBloom(capacity=1000, error_rate=1e-3)
+    bloom.add("jti")
+    bloom.rotate()
+    assert "jti" in bloom
+    bloom.rotate()
+    assert "jti" not in bloom
+
+
+def test_get_falls_back_to_redis_until_synced():
+    async def scenario():
+        redis = FakeRedis()
+        await redis.set("jti", "blocked")
+        blocked = CacheBlockedTkns(redis)
+        # Фильтр пуст и не синхронизирован, поэтому ответ берется из Redis
+        assert await blocked.get("jti") == b"blocked"
+
+        await blocked.load()
+        await _wait_for(lambda: blocked._synced)
+        calls = redis.get_calls
+        assert await blocked.get("unknown") is None
+        assert redis.get_calls == calls
+        assert await blocked.get("jti") == b"blocked"
+        await blocked.close()
+
+    asyncio.run(scenario())
+
+
+def test_set_propagates_to_other_instances():
+    async def scenario():
+        redis = FakeRedis()
+        first, second = CacheBlockedTkns(redis), CacheBlockedTkns(redis)
+        await first.load()
+        await second.load()
+        await _wait_for(lambda: first._synced and second._synced)
+        await first.set("jti", "blocked")
+        await _wait_for(lambda: "jti" in second.bloom)
+        await first.close()
+        await second.close()
+
+    asyncio.run(scenario())
+
+
+def test_listen_resubscribes_and_rescans_after_failure(monkeypatch, caplog):
+    monkeypatch.setattr(redis_cache, "BLOCKED_TOKENS_RESYNC_DELAY_IN_SECONDS", 0)
+
+    async def scenario():
+        redis = FakeRedis()
+        blocked = CacheBlockedTkns(redis)
+        await blocked.load()
+        await _wait_for(lambda: blocked._synced)
+        first = redis.pubsubs[0]
+
+        # Блокировка, сделанная пока подписка не работает, находится только повторным SCAN
+        await redis.set("during-outage", "blocked")
+        first.messages.put_nowait(ConnectionError("connection lost"))
+        await _wait_for(lambda: len(redis.pubsubs) == 2 and blocked._synced)
+
+        assert first.closed
+        assert redis.scan_calls == 2
+        assert "during-outage" in blocked.bloom
+        await redis.publish(redis_cache.BLOCKED_TOKENS_CHANNEL, "after-resubscribe")
+        await _wait_for(lambda: "after-resubscribe" in blocked.bloom)
+
+        await blocked.close()
+        assert blocked._listener.done() and blocked._rotator.done()
+        assert redis.pubsubs[1].closed
+
+    with caplog.at_level(logging.ERROR, logger=redis_cache.__name__):
+        asyncio.run(scenario())
+    assert "connection lost" in caplog.text
+
+
+def test_rotator_rotates_filter():
+    async def scenario():
+        blocked = CacheBlockedTkns(FakeRedis(), bloom=BlockedTokenBloom(capacity=1000), rotate_interval=0.01)
+        blocked.bloom.add("jti")
+        await blocked.load()
+        await _wait_for(lambda: "jti" not in blocked.bloom)
+        await blocked.close()
+
+    asyncio.run(scenario())
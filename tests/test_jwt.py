@@ -0,0 +1,92 @@
+import time
+
+import orjson
+import pytest
+
+from src.core.jwt import InvalidTokenError, _b64encode, _sign, decode_jwt, encode_jwt
+
+
+def _payload(**claims) -> dict:
+    now = int(time.time())
+    payload = {"jti": "abc", "iat": now, "nbf": now, "exp": now + 60}
+    payload.update(claims)
+    return payload
+
+
+def _forge(header: dict, payload, algorithm: str = "HS256") -> str:
+    """Токен с произвольным заголовком, подписанный известным алгоритмом"""
+    signing_input = _b64encode(orjson.dumps(header)) + b"." + _b64encode(orjson.dumps(payload))
+    return (signing_input + b"." + _b64encode(_sign(signing_input, algorithm))).decode()
+
+
+def test_round_trip():
+    payload = _payload(uuid="42")
+    assert decode_jwt(encode_jwt(payload)) == payload
+
+
+def test_tampered_signature():
+    header, payload, signature = encode_jwt(_payload()).split(".")
+    tampered = f"{header}.{payload}.{'A' if signature[0] != 'A' else 'B'}{signature[1:]}"
+    with pytest.raises(InvalidTokenError, match="Signature verification failed"):
+        decode_jwt(tampered)
+
+
+def test_tampered_payload():
+    header, _, signature = encode_jwt(_payload()).split(".")
+    forged_payload = _b64encode(orjson.dumps(_payload(uuid="admin"))).decode()
+    with pytest.raises(InvalidTokenError, match="Signature verification failed"):
+        decode_jwt(f"{header}.{forged_payload}.{signature}")
+
+
+@pytest.mark.parametrize("header", [
+    {"alg": "HS512", "typ": "JWT"},
+    {"alg": "none", "typ": "JWT"},
+    {"typ": "JWT"},
+])
+def test_alg_not_allowed(header):
+    with pytest.raises(InvalidTokenError, match="alg value is not allowed"):
+        decode_jwt(_forge(header, _payload(), algorithm="HS512"))
+
+
+def test_alg_not_in_allowed_list():
+    token = encode_jwt(_payload(), algorithm="HS512")
+    assert decode_jwt(token, algorithms=("HS512",))["jti"] == "abc"
+    with pytest.raises(InvalidTokenError, match="alg value is not allowed"):
+        decode_jwt(token)
+
+
+def test_expired():
+    with pytest.raises(InvalidTokenError, match="Signature has expired"):
+        decode_jwt(encode_jwt(_payload(exp=int(time.time()) - 1)))
+
+
+def test_not_yet_valid():
+    with pytest.raises(InvalidTokenError, match="not yet valid"):
+        decode_jwt(encode_jwt(_payload(nbf=int(time.time()) + 60)))
+
+
+@pytest.mark.parametrize("claim", ["exp", "nbf"])
+def test_non_integer_time_claim(claim):
+    with pytest.raises(InvalidTokenError, match=f"The {claim} claim must be an integer"):
+        decode_jwt(encode_jwt(_payload(**{claim: "soon"})))
+
+
+@pytest.mark.parametrize("token", [
+    "",
+    "x",
+    "x.y",
+    "!!!.###.$$$",
+    encode_jwt(_payload()).rsplit(".", 1)[0] + ".a",
+])
+def test_malformed_segments(token):
+    with pytest.raises(InvalidTokenError, match="Invalid token format"):
+        decode_jwt(token)
+
+
+@pytest.mark.parametrize("header, payload", [
+    ({"alg": "HS256", "typ": "JWT"}, [1, 2, 3]),
+    ([1, 2, 3], _payload()),
+])
+def test_non_object_segments(header, payload):
+    with pytest.raises(InvalidTokenError, match="Invalid token format"):
+        decode_jwt(_forge(header, payload))
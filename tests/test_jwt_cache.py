@@ -0,0 +1,45 @@
+import time
+
+import pytest
+from cachetools import TLRUCache
+
+from src.core import jwt_cache
+from src.core.jwt import encode_jwt
+
+
+@pytest.fixture
+def small_cache(monkeypatch):
+    cache = TLRUCache(maxsize=3, ttu=jwt_cache._ttu, timer=time.time)
+    monkeypatch.setattr(jwt_cache, "_cache", cache)
+    return cache
+
+
+def _token(jti: str) -> str:
+    now = int(time.time())
+    return encode_jwt({"jti": jti, "iat": now, "nbf": now, "exp": now + 60})
+
+
+def test_verify_cached_returns_payload(small_cache):
+    token = _token("a")
+    assert jwt_cache.verify_cached(token)["jti"] == "a"
+    assert jwt_cache._token_key(token) in small_cache
+
+
+def test_invalidate_token_keeps_lru_order(small_cache):
+    a, b, c, d, e = (_token(jti) for jti in "abcde")
+    for token in (a, b, c):
+        jwt_cache.verify_cached(token)
+    # "a" становится самым свежим, порядок вытеснения: c, a
+    jwt_cache.verify_cached(a)
+    jwt_cache.invalidate_token(b)
+    assert jwt_cache._token_key(b) not in small_cache
+
+    jwt_cache.verify_cached(d)
+    jwt_cache.verify_cached(e)
+    assert jwt_cache._token_key(c) not in small_cache
+    assert jwt_cache._token_key(a) in small_cache
+
+
+def test_invalidate_unknown_token(small_cache):
+    jwt_cache.invalidate_token(_token("missing"))
+    assert len(small_cache) == 0
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.api.v1.resources.users import refresh_token
+from src.api.v1.schemas import UserModel
+from src.core.jwt import create_access_token, create_refresh_token
+from src.db import CacheBlockedTkns, CacheRedis, CacheRefreshTkns
+from src.models import User
+from src.services import UserService
+from tests.fakes import FakeRedis
+
+
+@pytest.fixture
+def user():
+    return User(username="alice", email="alice@example.com", hashed_password="-")
+
+
+@pytest.fixture
+def user_service(user):
+    service = UserService(cache=CacheRedis(FakeRedis()), access_cash=CacheBlockedTkns(FakeRedis()),
+                          refresh_cash=CacheRefreshTkns(FakeRedis()))
+
+    async def get_by_uuid(session, uuid):
+        return user if uuid == str(user.uuid) else None
+
+    service.get_by_uuid = get_by_uuid
+    return service
+
+
+def _refresh(user_service: UserService, token: str):
+    return asyncio.run(refresh_token(user_service=user_service, session=None, token=token))
+
+
+def _login(user_service: UserService, user: User) -> str:
+    token = create_refresh_token(user_uuid=str(user.uuid))
+    asyncio.run(user_service.add_refresh_token(token))
+    return token
+
+
+def test_refresh_rejects_access_token(user_service, user):
+    user_data = UserModel(**user.model_dump()).model_dump(mode="json")
+    access_token = create_access_token(data=user_data, refresh_jti=user_service.get_jti(_login(user_service, user)))
+    with pytest.raises(HTTPException) as error:
+        _refresh(user_service, access_token)
+    assert error.value.status_code == 403
+
+
+def test_refresh_rejects_unknown_jti(user_service, user):
+    with pytest.raises(HTTPException) as error:
+        _refresh(user_service, create_refresh_token(user_uuid=str(user.uuid)))
+    assert error.value.status_code == 401
+
+
+def test_refresh_token_is_accepted_once(user_service, user):
+    token = _login(user_service, user)
+    rotated = _refresh(user_service, token)
+    with pytest.raises(HTTPException) as error:
+        _refresh(user_service, token)
+    assert error.value.status_code == 401
+
+    assert _refresh(user_service, rotated.refresh_token).refresh_token != rotated.refresh_token
+    with pytest.raises(HTTPException) as error:
+        _refresh(user_service, rotated.refresh_token)
+    assert error.value.status_code == 401